@@ -1,5 +1,9 @@
+import logging
+import signal
 from threading import Thread
 
+import zmq
+
 from systems.clients import CanbusNet, PiNet
 from systems.core import ControllerWorker, CoreServer
 
@@ -12,23 +16,37 @@ _backend_address = "inproc://backend"
 
 def start_systems():
     """Set up all threads with respective tasks."""
-    core_server = CoreServer(_backend_address, _frontend_address)
-    controller_worker = ControllerWorker(_backend_address)
-    pi_net = PiNet(_frontend_address)
-    canbus_net = CanbusNet(_frontend_address)
+    # one context for every endpoint, inproc only works within a context.
+    # inproc never touches the I/O threads, so the default count is enough
+    context = zmq.Context()
+    core_server = CoreServer(_backend_address,
+                             _frontend_address,
+                             context=context)
+    controller_worker = ControllerWorker(_backend_address, context)
+    pi_net = PiNet(_frontend_address, context)
+    canbus_net = CanbusNet(_frontend_address, context)
 
     server = Thread(target=core_server)
     controllers = Thread(target=controller_worker)
-    ui = Thread(target=pi_net)
-    canbus = Thread(target=canbus_net)
+    # clients block on their sockets with no shutdown path; let them die
+    # with the process once the server and worker have stopped
+    ui = Thread(target=pi_net, daemon=True)
+    canbus = Thread(target=canbus_net, daemon=True)
+
+    def shutdown(signum, frame):
+        core_server.stop()
+        controller_worker.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
 
     tasks = (server, controllers, canbus, ui)
     for task in tasks:
         task.start()
 
-    for task in tasks:
+    for task in (server, controllers):
         task.join()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     start_systems()
@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from random import randint
 from time import sleep
 
+import msgspec
 import zmq
 
+from .messages import ControllerUpdate
+
 
 class Client(ABC):
     core_frontend_address: str
@@ -54,19 +59,26 @@ class Client(ABC):
 
 class CanbusNet(Client):
 
-    def __init__(self, core_frontend_address: str):
+    def __init__(self,
+                 core_frontend_address: str,
+                 context: zmq.Context | None = None):
         """Client endpoint for Can Bus communication.
 
         Args:
             core_frontend_address (str)
+            context (zmq.Context, optional): Shared context, must be the
+                same as the server's for inproc. Defaults to
+                zmq.Context.instance().
         """
-        context = zmq.Context.instance()
+        context = context or zmq.Context.instance()
 
         self.core_frontend_address = core_frontend_address
         self.identity = u'canbus'
 
         self.socket = context.socket(zmq.DEALER)
         self.socket.identity = self.identity.encode('ascii')
+        self.encoder = msgspec.msgpack.Encoder()
+        self.decoder = msgspec.msgpack.Decoder(ControllerUpdate)
 
         self.is_connected = False
 
@@ -78,11 +90,11 @@ class CanbusNet(Client):
         # kept this part alone for simplicity when we setup py can
         try:
             while self.is_connected:
-                self.socket.send_json(
-                    {"motor": {
-                        "temperature": randint(15, 30)
-                    }})
-                message = self.socket.recv_json()
+                self.socket.send(
+                    self.encoder.encode(
+                        ControllerUpdate("motor",
+                                         {"temperature": randint(15, 30)})))
+                message = self.decoder.decode(self.socket.recv())
                 print(f"Can Bus received: {message}")
                 sleep(1)
         except KeyboardInterrupt:
@@ -104,21 +116,28 @@ class CanbusNet(Client):
 
 class PiNet(Client):
 
-    def __init__(self, core_frontend_address: str):
+    def __init__(self,
+                 core_frontend_address: str,
+                 context: zmq.Context | None = None):
         """Client endpoint for user interface communication.
 
         # TODO: set up websockets, can be done in ZMQ
 
         Args:
             core_frontend_address (str)
+            context (zmq.Context, optional): Shared context, must be the
+                same as the server's for inproc. Defaults to
+                zmq.Context.instance().
         """
-        context = zmq.Context.instance()
+        context = context or zmq.Context.instance()
 
         self.core_frontend_address = core_frontend_address
         self.identity = u'ui'
 
         self.socket = context.socket(zmq.DEALER)
         self.socket.identity = self.identity.encode('ascii')
+        self.encoder = msgspec.msgpack.Encoder()
+        self.decoder = msgspec.msgpack.Decoder(ControllerUpdate)
 
         self.is_connected = False
 
@@ -130,11 +149,12 @@ class PiNet(Client):
 
         try:
             while True:
-                self.socket.send_json(
-                    {"climate": {
-                        "weathertemperature": randint(15, 30)
-                    }})
-                message = self.socket.recv_json()
+                self.socket.send(
+                    self.encoder.encode(
+                        ControllerUpdate(
+                            "climate",
+                            {"weathertemperature": randint(15, 30)})))
+                message = self.decoder.decode(self.socket.recv())
                 print(f"UI received: {message}")
                 sleep(2)
         except KeyboardInterrupt:
@@ -1,26 +1,77 @@
 import attr
 
 
-def _type_validator(instance: object, variable: attr.Attribute,
-                    new_value: any):
-    """Type validation for @attr.s - on_setattr().
+def _make_type_validator(field_types: dict):
+    """Build a type-checking __setattr__ for a controller class.
+
+    The exact-type check short-circuits the common case, falling back on
+    isinstance() so subclasses of a declared type are still accepted.
 
     Args:
-        instance (object): Instance the new attribute is being set on
-        variable (attr.Attribute): Instance attribute
-        new_value (any)
+        field_types (dict): Attribute name to declared type
+
+    Returns:
+        function: __setattr__ for the decorated class
+    """
+    get_type = field_types.get
+    object_setattr = object.__setattr__
+
+    def __setattr__(self, name: str, new_value: any):
+        """Type validation on attribute assignment.
+
+        Args:
+            name (str): Attribute being set
+            new_value (any)
+
+        Raises:
+            TypeError: Thrown if type mismatch
+        """
+        current_variable_type = get_type(name)
+        if type(new_value) is not current_variable_type:
+            if current_variable_type is not None and not isinstance(
+                    new_value, current_variable_type):
+                raise TypeError(
+                    f"Trying to set type {type(new_value)} "
+                    f"on attribute of type {current_variable_type}")
+        object_setattr(self, name, new_value)
+
+    return __setattr__
 
-    Raises:
-        TypeError: Thrown if type mismatch
+
+def _make_update(field_names: list):
+    """Build an `update` method for a controller class.
+
+    Unknown keys are rejected before anything is assigned, so a bad
+    message never leaves a controller half updated. Assignments still go
+    through the class' __setattr__, so type validation is kept.
+
+    Args:
+        field_names (list): Attribute names of the controller
 
     Returns:
-        new_value
+        function: update(self, attributes) for the decorated class
     """
-    current_variable_type = variable.type
-    if not isinstance(new_value, current_variable_type):
-        raise TypeError(f"Trying to set type {type(new_value)} "
-                        f"on attribute of type {current_variable_type}")
-    return new_value
+    known_names = frozenset(field_names)
+
+    def update(self, attributes: dict):
+        """Set several attributes at once from a mapping.
+
+        Args:
+            attributes (dict): New values keyed by attribute name
+
+        Raises:
+            AttributeError: Thrown if a key isn't an attribute of the
+                controller
+            TypeError: Thrown if type mismatch
+        """
+        if not attributes.keys() <= known_names:
+            unknown = attributes.keys() - known_names
+            raise AttributeError(f"{type(self).__name__} object has no "
+                                 f"attribute(s) {sorted(unknown)}")
+        for name, new_value in attributes.items():
+            setattr(self, name, new_value)
+
+    return update
 
 
 class ControllerDecorator:
@@ -35,6 +86,7 @@ class ControllerDecorator:
         dummy = DummyController()
         dummy['variable'] = 4
         variable = dummy['variable]
+        dummy.update({'variable': 5})
     ::
     """
 
@@ -50,12 +102,12 @@ class ControllerDecorator:
     def __call__(self, class_):
         class_.__getitem__ = ControllerDecorator.__getitem__
         class_.__setitem__ = ControllerDecorator.__setitem__
-        class_ = attr.attrs(class_,
-                            slots=True,
-                            auto_attribs=True,
-                            eq=False,
-                            on_setattr=_type_validator)
+        class_ = attr.attrs(class_, slots=True, auto_attribs=True, eq=False)
+        class_.__setattr__ = _make_type_validator(
+            {field.name: field.type for field in attr.fields(class_)})
         class_.asdict = ControllerDecorator.asdict
+        class_.update = _make_update(
+            [field.name for field in attr.fields(class_)])
         return class_
 
 
@@ -1,31 +1,85 @@
 from __future__ import annotations
 
+import logging
+import threading
 from itertools import count
 
+import msgspec
 import zmq
-from zmq.utils import jsonapi
 
 from .controllers import controllers
+from .messages import ControllerMessage, ControllerUpdate
+
+log = logging.getLogger(__name__)
+
+# payload of the handshake ping telling peers the server is ready
+_READY_MESSAGE = b''
+
+# deep enough to absorb bursts without ZMQ dropping or blocking on the proxy
+_HIGH_WATER_MARK = 65536
+
+
+def _configure_low_latency(socket: zmq.Socket):
+    """Set latency-oriented options on a core socket.
+
+    Only options that matter on inproc are set here. IMMEDIATE is left to
+    the caller: it only affects pipes created by `connect`, so it does
+    nothing on the server's bound sockets and is set on the worker alone.
+
+    Args:
+        socket (zmq.Socket)
+    """
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.setsockopt(zmq.SNDHWM, _HIGH_WATER_MARK)
+    socket.setsockopt(zmq.RCVHWM, _HIGH_WATER_MARK)
 
 
 class CoreServer:
 
-    def __init__(self, backend_binding: str, frontend_binding: str):
+    def __init__(self,
+                 backend_binding: str,
+                 frontend_binding: str,
+                 control_binding: str = "inproc://core-control",
+                 required_clients: int = 2,
+                 required_workers: int = 1,
+                 context: zmq.Context | None = None):
         """ZMQ server for communication between frontend clients and backend workers.
 
         Args:
             backend_binding (str): Address of backend binding
             frontend_binding (str): Address of frontend binding
+            control_binding (str, optional): Address of proxy control binding.
+                Defaults to "inproc://core-control".
+            required_clients (int, optional): Clients to wait for before
+                proxying. Defaults to 2.
+            required_workers (int, optional): Workers to wait for before
+                proxying. Defaults to 1.
+            context (zmq.Context, optional): Shared context, must be the
+                same as every connecting peer's for inproc. Defaults to
+                zmq.Context.instance().
         """
-        context = zmq.Context.instance()
+        context = context or zmq.Context.instance()
 
+        self.context = context
         self.backend_binding = backend_binding
         self.frontend_binding = frontend_binding
+        self.control_binding = control_binding
+        self.required_clients = required_clients
+        self.required_workers = required_workers
         self.worker_ids = set()
         self.client_identities = set()
 
         self.backend = context.socket(zmq.DEALER)
         self.frontend = context.socket(zmq.ROUTER)
+        self.control = context.socket(zmq.PAIR)
+        # `stop` sends through one long-lived peer; a PAIR opened and closed
+        # per call can be torn down before TERMINATE reaches the server
+        self._stopper = context.socket(zmq.PAIR)
+        self._stopper.setsockopt(zmq.LINGER, 0)
+        self._stopper.connect(control_binding)
+        self._stop_lock = threading.Lock()
+        _configure_low_latency(self.backend)
+        _configure_low_latency(self.frontend)
         self.poller = zmq.Poller()
 
         self.is_running = False
@@ -33,64 +87,55 @@ class CoreServer:
     def run(self):
         """Main loop to `run` the server, primarily called through __call__."""
         self.start_listening()
-        print("Server listening.")
-
-        while not self.is_fully_connected:
-            try:
-                self.gather_connections()
-            except KeyboardInterrupt:
-                return
-
-        self.send_ready_messages()
-        print(f"{len(self.worker_ids)} worker(s) ready")
-        print(f"Server initialized, connected to {self.client_identities}")
+        log.info("Server listening.")
 
+        clients, workers = self.client_identities, self.worker_ids
+        required_clients = self.required_clients
+        required_workers = self.required_workers
         while self.is_running:
-            try:
-                self.proxy_messages()
-            except KeyboardInterrupt:
+            clients_ready = len(clients) >= required_clients
+            if clients_ready and len(workers) >= required_workers:
                 break
+            self.gather_connections()
+
+        if self.is_running:
+            self.send_ready_messages()
+            log.info("%d worker(s) ready", len(self.worker_ids))
+            log.info("Server initialized, connected to %s",
+                     self.client_identities)
+
+            # forwarding happens entirely inside libzmq until `stop` is called
+            zmq.proxy_steerable(self.frontend, self.backend, None,
+                                self.control)
 
         self.frontend.close()
         self.backend.close()
+        self.control.close()
+        with self._stop_lock:
+            self._stopper.close()
         self.is_running = False
 
+    def stop(self):
+        """Terminate the server, safe to call from any thread.
+
+        Wakes the handshake poll or terminates the running proxy, whichever
+        the server is currently in. A no-op once the server has exited.
+        """
+        with self._stop_lock:
+            if not self._stopper.closed:
+                self._stopper.send(b"TERMINATE")
+
     def start_listening(self):
         """Configure frontend-backend poller and start listening."""
         self.frontend.bind(self.frontend_binding)
         self.backend.bind(self.backend_binding)
+        self.control.bind(self.control_binding)
         self.poller.register(self.backend, zmq.POLLIN)
         self.poller.register(self.frontend, zmq.POLLIN)
+        self.poller.register(self.control, zmq.POLLIN)
 
         self.is_running = True
 
-    @property
-    def is_fully_connected(self) -> bool:
-        """Check if all required clients and workers are connected.
-
-        Returns:
-            bool
-        """
-        # it might be good to parametrize this later on.
-        return len(self.client_identities) >= 2 and len(self.worker_ids) >= 1
-
-    def proxy_messages(self):
-        """Proxy messages between frontend and backend.
-
-        Currently sending all messages from frontend to backend, all
-        messages from backend to frontend. In the future, this is probably
-        where the logic for returning message to sender will go.
-        """
-        incoming_messages = dict(self.poller.poll())
-
-        if self.frontend in incoming_messages:
-            message = self.frontend.recv_multipart()
-            self.backend.send_multipart(message, zmq.NOBLOCK)
-
-        if self.backend in incoming_messages:
-            message = self.backend.recv_multipart()
-            self.frontend.send_multipart(message)
-
     def gather_connections(self):
         """Synchronize start between server and connected sockets."""
         new_connections = dict(self.poller.poll())
@@ -98,22 +143,32 @@ class CoreServer:
         if self.frontend in new_connections:
             [client_identity, _] = self.frontend.recv_multipart()
             self.client_identities.add(client_identity)
-            print(f"{client_identity} connected")
+            log.info("%s connected", client_identity)
 
         if self.backend in new_connections:
             worker_id = self.backend.recv()
             self.worker_ids.add(worker_id)
-            print(f"Worker @ {worker_id} connected")
+            log.info("Worker @ %s connected", worker_id)
 
-    def send_ready_messages(self, ready_message: str = b''):
-        """Alert frontend and backend connections server is ready to receive.
+        if self.control in new_connections:
+            self.control.recv()
+            self.is_running = False
+
+    def send_ready_messages(self, ready_message: bytes = _READY_MESSAGE):
+        """Close the handshake and alert connections server is ready to receive.
+
+        Every client's frame is built from the final `client_identities`
+        before anything is sent, so the burst goes out back to back.
 
         Args:
-            ready_message (str, optional): Defaults to b''.
+            ready_message (bytes, optional): Defaults to b''.
         """
+        ready_frames = tuple(
+            [client, ready_message] for client in self.client_identities)
         self.backend.send(ready_message)
-        for client in self.client_identities:
-            self.frontend.send_multipart([client, ready_message])
+        send = self.frontend.send_multipart
+        for frame in ready_frames:
+            send(frame, zmq.NOBLOCK)
 
     def __call__(self) -> None:
         """Treat CoreServer instance as a function.
@@ -130,32 +185,58 @@ class CoreServer:
 
 class ControllerWorker:
     _instance_count = count(0)
+    # only bounds how long `stop` takes to be noticed; messages wake the poll
+    poll_timeout = 100
 
-    def __init__(self, core_backend_address: str):
+    def __init__(self,
+                 core_backend_address: str,
+                 context: zmq.Context | None = None):
         """Controller worker class to process messages and manipulate controllers.
 
         Args:
             core_backend_address (str): Core backend binding address.
+            context (zmq.Context, optional): Shared context, must be the
+                same as the server's for inproc. Defaults to
+                zmq.Context.instance().
         """
-        context = zmq.Context.instance()
+        context = context or zmq.Context.instance()
         self._id = next(self._instance_count)
         self.identity = u'controller-worker{}'.format(self._id)
         self.core_backend_address = core_backend_address
         self.controllers = controllers
         # NOTE: we need to look into if we can replace dealer with rep
         self.socket = context.socket(zmq.DEALER)
-        self.socket.identity = self.identity.encode('ascii')
+        self._identity_bytes = self.identity.encode('ascii')
+        self.socket.identity = self._identity_bytes
+        _configure_low_latency(self.socket)
+        # only queue messages onto completed connections
+        self.socket.setsockopt(zmq.IMMEDIATE, 1)
+        self.encoder = msgspec.msgpack.Encoder()
+        self.decoder = msgspec.msgpack.Decoder(ControllerMessage)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
 
         self.is_connected = False
+        # set up front so a `stop` issued before `run` isn't overwritten
+        self.is_running = True
 
     def run(self):
         """Start worker for controller classes."""
         if not self.connect_to_server():
-            print(f"{self.identity} quitting")
+            log.warning("%s quitting", self.identity)
+            self.socket.close()
             return
 
-        while True:
-            self.receive_messages()
+        socket, poll = self.socket, self.poller.poll
+        while self.is_running:
+            if socket in dict(poll(self.poll_timeout)):
+                self.receive_messages()
+
+        self.socket.close()
+
+    def stop(self):
+        """Stop the worker loop after its current poll, safe from any thread."""
+        self.is_running = False
 
     def connect_to_server(self) -> bool:
         """Connect and register to server.
@@ -164,45 +245,53 @@ class ControllerWorker:
             bool: True if connected.
         """
         self.socket.connect(self.core_backend_address)
-        print(
-            f"{self.identity} started, connecting to {self.core_backend_address}"
-        )
+        log.info("%s started, connecting to %s", self.identity,
+                 self.core_backend_address)
 
         if self.register_to_server():
-            print(f"{self.identity}: Connection established")
+            log.info("%s: Connection established", self.identity)
             self.is_connected = True
-        else:
-            print("Connection failure")
+        elif self.is_running:
+            log.error("%s: Connection failure", self.identity)
         return self.is_connected
 
     def receive_messages(self):
         """Loop to listen for and respond to incoming messages."""
-        try:
-            identity, message = self.socket.recv_multipart()
-        except KeyboardInterrupt:
-            return
-        message: dict = jsonapi.loads(message)
-        print(f"Worker recieved {message} from {identity}")
+        identity, message = self.socket.recv_multipart()
+        message = self.decoder.decode(message)
+        log.debug("Worker received %s from %s", message, identity)
         self.process_messages(message)
-        message.update({"processed": True})
-        outgoing = jsonapi.dumps(message)
+        outgoing = self.encoder.encode(message)
         self.socket.send_multipart([identity, outgoing])
 
     def register_to_server(self):
         """Register self to server for synchronized start.
 
+        Both waits poll in `poll_timeout` steps so `stop` can interrupt a
+        handshake the server never completes.
+
         Returns:
-            bool: True if connection granted.
+            bool: True if connection granted, False if stopped first.
         """
-        self.socket.send(bytes(self.identity, 'utf-8'))
-        ready_ping = self.socket.recv()
-        return b'' in ready_ping
-
-    def process_messages(self, message: list[dict] | dict):
+        socket = self.socket
+        while not socket.poll(self.poll_timeout, zmq.POLLOUT):
+            if not self.is_running:
+                return False
+        socket.send(self._identity_bytes)
+
+        poll = self.poller.poll
+        while socket not in dict(poll(self.poll_timeout)):
+            if not self.is_running:
+                return False
+        ready_ping = socket.recv()
+        return _READY_MESSAGE in ready_ping
+
+    def process_messages(self,
+                         message: list[ControllerUpdate] | ControllerUpdate):
         """Intermediate step for message processing for list vs single element.
 
         Args:
-            message (list[dict] | dict)
+            message (list[ControllerUpdate] | ControllerUpdate)
         """
         if isinstance(message, list):
             for msg in message:
@@ -210,22 +299,20 @@ class ControllerWorker:
         else:
             self.process_message(message)
 
-    def process_message(self, message: dict):
+    def process_message(self, message: ControllerUpdate):
         """Process incoming message and update controller.
 
         Args:
-            message (dict)
+            message (ControllerUpdate)
         """
-        controller: str
-        attributes: dict
-
-        [(controller, attributes)] = message.items()
-        for attribute, new_value in attributes.items():
-            old_value = self.controllers[controller][attribute]
-            self.controllers[controller][attribute] = new_value
-            print(
-                f"{controller} controller attribute {attribute} changed to {new_value} "
-                f"from {old_value}")
+        controller = message.controller
+        current = self.controllers[controller]
+        if log.isEnabledFor(logging.DEBUG):
+            for attribute, new_value in message.attributes.items():
+                log.debug("%s controller attribute %s changed to %s from %s",
+                          controller, attribute, new_value, current[attribute])
+        current.update(message.attributes)
+        message.processed = True
 
     def __call__(self) -> None:
         return self.run()
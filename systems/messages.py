@@ -0,0 +1,19 @@
+from typing import Any, Union
+
+import msgspec
+
+
+class ControllerUpdate(msgspec.Struct):
+    """Wire format for updating a single controller.
+
+    Attributes:
+        controller (str): Name of the controller to update.
+        attributes (dict[str, Any]): New values keyed by attribute name.
+        processed (bool): Set by the worker once applied. Defaults to False.
+    """
+    controller: str
+    attributes: dict[str, Any]
+    processed: bool = False
+
+
+ControllerMessage = Union[ControllerUpdate, list[ControllerUpdate]]
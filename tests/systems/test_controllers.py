@@ -36,3 +36,38 @@ def test_controller_decorator_type_validation(dummy_controller):
 
     with pytest.raises(TypeError):
         dummy_controller['attr2'] = 4
+
+
+def test_controller_decorator_constructor_type_validation(dummy_controller):
+    DummyController = type(dummy_controller)
+
+    with pytest.raises(TypeError):
+        DummyController(attr1="string on int")
+
+    assert DummyController(attr1=3, attr2="set").asdict() == {
+        'attr1': 3,
+        'attr2': "set"
+    }
+
+
+def test_controller_decorator_accepts_subclasses(dummy_controller):
+    dummy_controller['attr1'] = True
+
+    assert dummy_controller['attr1'] is True
+
+
+def test_controller_decorator_update(dummy_controller):
+    dummy_controller.update({'attr1': 5, 'attr2': "second attr"})
+    assert dummy_controller.asdict() == {'attr1': 5, 'attr2': "second attr"}
+
+    dummy_controller.update({'attr1': 6})
+    assert dummy_controller.asdict() == {'attr1': 6, 'attr2': "second attr"}
+
+
+def test_controller_decorator_update_validation(dummy_controller):
+    with pytest.raises(AttributeError):
+        dummy_controller.update({'attr1': 5, 'attr3': 0})
+    assert dummy_controller.asdict() == {'attr1': 0, 'attr2': "attr2"}
+
+    with pytest.raises(TypeError):
+        dummy_controller.update({'attr2': 4})
@@ -0,0 +1,116 @@
+from threading import Thread
+
+import msgspec
+import pytest
+import zmq
+
+from systems import controllers
+from systems.core import ControllerWorker, CoreServer
+from systems.messages import ControllerMessage, ControllerUpdate
+
+_backend_address = "inproc://test-backend"
+_frontend_address = "inproc://test-frontend"
+
+
+@pytest.fixture
+def context():
+    context = zmq.Context()
+    yield context
+    context.destroy(linger=0)
+
+
+@pytest.fixture
+def worker(context):
+    worker = ControllerWorker(_backend_address, context)
+    worker.controllers = {
+        "motor": controllers.MotorController(),
+        "battery": controllers.BatteryController()
+    }
+    return worker
+
+
+def start(*targets):
+    threads = [Thread(target=target, daemon=True) for target in targets]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def assert_joined(threads):
+    for thread in threads:
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+
+
+def test_worker_processes_update_list(worker):
+    encoder = msgspec.msgpack.Encoder()
+    decoder = msgspec.msgpack.Decoder(ControllerMessage)
+    message = decoder.decode(
+        encoder.encode([
+            ControllerUpdate("motor", {
+                "speed": 5,
+                "rpm": 9
+            }),
+            ControllerUpdate("battery", {"voltage": 7})
+        ]))
+
+    worker.process_messages(message)
+
+    assert worker.controllers["motor"].asdict() == {
+        'speed': 5,
+        'voltage': 0,
+        'temperature': 0,
+        'rpm': 9
+    }
+    assert worker.controllers["battery"]["voltage"] == 7
+    assert all(update.processed for update in message)
+
+
+def test_stop_during_handshake(context):
+    server = CoreServer(_backend_address,
+                        _frontend_address,
+                        required_clients=1,
+                        context=context)
+    worker = ControllerWorker(_backend_address, context)
+    threads = start(server, worker)
+
+    # no client ever connects, so both sides are stuck in the handshake
+    server.stop()
+    worker.stop()
+
+    assert_joined(threads)
+
+
+def test_stop_while_proxying():
+    encoder = msgspec.msgpack.Encoder()
+    decoder = msgspec.msgpack.Decoder(ControllerUpdate)
+
+    # a lost TERMINATE only hangs the server some of the time, so repeat
+    # the whole round trip enough times to make a regression show up
+    for _ in range(50):
+        context = zmq.Context()
+        server = CoreServer(_backend_address,
+                            _frontend_address,
+                            required_clients=1,
+                            context=context)
+        worker = ControllerWorker(_backend_address, context)
+        worker.poll_timeout = 10
+        threads = start(server, worker)
+
+        client = context.socket(zmq.DEALER)
+        client.identity = b'client'
+        client.connect(_frontend_address)
+        client.send(b'')
+        assert client.poll(2000)
+        client.recv()
+
+        client.send(encoder.encode(ControllerUpdate("motor", {"rpm": 3})))
+        assert client.poll(2000)
+        assert decoder.decode(client.recv()).processed
+
+        server.stop()
+        worker.stop()
+
+        assert_joined(threads)
+        client.close()
+        context.destroy(linger=0)
@@ -0,0 +1,27 @@
+import msgspec
+import pytest
+
+from systems.messages import ControllerMessage, ControllerUpdate
+
+
+@pytest.fixture
+def codec():
+    decoder = msgspec.msgpack.Decoder(ControllerMessage)
+    return msgspec.msgpack.Encoder(), decoder
+
+
+def test_controller_update_round_trip(codec):
+    encoder, decoder = codec
+    update = ControllerUpdate("motor", {"speed": 5})
+
+    decoded = decoder.decode(encoder.encode(update))
+
+    assert decoded == update
+    assert decoded.processed is False
+
+
+def test_controller_update_rejects_bad_shape(codec):
+    encoder, decoder = codec
+
+    with pytest.raises(msgspec.ValidationError):
+        decoder.decode(encoder.encode({"motor": {"speed": 5}}))